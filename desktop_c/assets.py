@@ -0,0 +1,84 @@
+import hashlib
+import os
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("CHA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "desktop_c"))
+
+
+def asset_path(name):
+    return os.path.join(ASSET_DIR, name)
+
+
+class LoadTask(QRunnable):
+    def __init__(self, registry, key):
+        super().__init__()
+        self.registry = registry
+        self.key = key
+
+    def run(self):
+        self.registry.decoded.emit(self.key, self.registry.decode(*self.key))
+
+
+class ImageRegistry(QObject):
+    # 이미지는 (경로, 크기, 프레임 수)마다 한 번만 디코딩해서 모두가 같이 쓴다
+    decoded = pyqtSignal(object, object)
+    ready = pyqtSignal(str)
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.images = {}
+        self.pending = set()
+        self.decoded.connect(self.store)
+
+    def image(self, path, size, frames=1):
+        return self.images.get((path, size, frames))
+
+    def load(self, path, size, frames=1):
+        key = (path, size, frames)
+        if key in self.images or key in self.pending:
+            return
+        self.pending.add(key)
+        QThreadPool.globalInstance().start(LoadTask(self, key))
+
+    def load_now(self, path, size, frames=1):
+        key = (path, size, frames)
+        if key not in self.images:
+            self.pending.add(key)
+            self.store(key, self.decode(*key))
+        return self.images[key]
+
+    def store(self, key, image):
+        self.pending.discard(key)
+        self.images[key] = image
+        self.ready.emit(key[0])
+
+    def decode(self, path, size, frames=1):
+        # GUI 스레드 밖에서 돌아도 되도록 QImage만 쓴다. 축소본은 파일 해시로 디스크에 캐시한다
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return QImage()
+        digest = hashlib.sha1(data).hexdigest()
+        cache_path = os.path.join(self.cache_dir, f"{digest}-{size}x{frames}.png")
+        image = QImage(cache_path) if os.path.exists(cache_path) else QImage()
+        if not image.isNull():
+            return image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        image = QImage.fromData(data)
+        if image.isNull():
+            return image
+        image = image.scaled(size * frames, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            image.save(cache_path + ".tmp", "PNG")
+            os.replace(cache_path + ".tmp", cache_path)
+        except OSError:
+            pass
+        return image
+
+
+image_registry = ImageRegistry()
@@ -0,0 +1,398 @@
+import argparse
+import json
+import shutil
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QT_LOGGING_RULES", "default.warning=false")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QEvent, QEventLoop, QTimer, QT_VERSION_STR
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont
+
+import cha
+from scheduler import scheduler
+from instrument import metrics
+from assets import image_registry
+from sim import Simulation
+from swarm import Swarm
+from world import World, overlapping_pairs, naive_pairs
+from cha import DesktopCharacter, CharacterSwarm, Compositor, render_bubble, bubble_pool, BUBBLE_WIDTH, BUBBLE_HEIGHT
+
+TICKS = 200
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_event_loop(app, seconds):
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    start = time.process_time()
+    loop.exec_()
+    return (time.process_time() - start) / seconds * 100
+
+
+def time_ticks(tick, ticks=TICKS):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        tick()
+    return (time.perf_counter() - start) / ticks * 1e6
+
+
+def close_all(widgets):
+    for widget in widgets:
+        widget.close()
+        widget.deleteLater()
+    QApplication.processEvents()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def bench_swarm(app, counts=(1, 10, 100, 1000)):
+    cha.SPEECH_SECONDS = 10 ** 6
+    rows = []
+    for count in counts:
+        characters = [DesktopCharacter() for _ in range(count)]
+        for character in characters:
+            character.show()
+        widget_cpu = run_event_loop(app, 2)
+        for character in characters:
+            scheduler.set_active(character.move_job, False)
+        widget_tick = time_ticks(lambda: [c.wander_around() for c in characters])
+        close_all(characters)
+
+        swarm = CharacterSwarm(count)
+        swarm.show()
+        swarm_cpu = run_event_loop(app, 2)
+        scheduler.set_active(swarm.move_job, False)
+        swarm_tick = time_ticks(swarm.tick)
+        close_all(swarm.characters)
+
+        rows.append({"n": count, "widget_us_per_tick": widget_tick, "swarm_us_per_tick": swarm_tick,
+                     "widget_cpu_pct": widget_cpu, "swarm_cpu_pct": swarm_cpu})
+    return rows
+
+
+def legacy_bubble_paint(painter, message):
+    # 캐시 도입 전 SpeechBubble.paintEvent 그대로 (비교 기준)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setBrush(QColor(34, 139, 34, 30))
+    painter.setPen(Qt.NoPen)
+    painter.drawRoundedRect(12, 12, 160, 50, 15, 15)
+    painter.setBrush(QColor(240, 255, 245, 240))
+    painter.setPen(QColor(152, 251, 152))
+    painter.drawRoundedRect(10, 10, 160, 50, 15, 15)
+    painter.setPen(QColor(50, 90, 50))
+    font = QFont("Segoe Print", 11, QFont.Bold)
+    if not QFont("Segoe Print").exactMatch():
+        font = QFont("Arial Rounded MT Bold", 11, QFont.Bold)
+    painter.setFont(font)
+    painter.drawText(15, 20, 150, 40, Qt.AlignCenter | Qt.TextWordWrap, message)
+
+
+def bench_bubble(app, paints=2000):
+    message = "저랑 놀아줄래요?"
+    image = QImage(BUBBLE_WIDTH, BUBBLE_HEIGHT, QImage.Format_ARGB32_Premultiplied)
+
+    def paint(draw):
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        draw(painter)
+        painter.end()
+
+    render_bubble.cache_clear()
+    start = time.perf_counter()
+    render_bubble(message)
+    first = (time.perf_counter() - start) * 1e6
+    legacy = time_ticks(lambda: paint(lambda p: legacy_bubble_paint(p, message)), paints)
+    cached = time_ticks(lambda: paint(lambda p: p.drawPixmap(0, 0, render_bubble(message))), paints)
+    return [{"legacy_paint_us": legacy, "cached_paint_us": cached, "first_render_us": first}]
+
+
+def rss_kb():
+    # psutil이 있으면 현재 RSS, 없으면 최대 RSS (ru_maxrss는 macOS에서 바이트, 리눅스에서 KiB)
+    if psutil is not None:
+        return psutil.Process().memory_info().rss // 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def bench_soak(app, characters=20):
+    # 말풍선을 빠르게 반복 생성해 창 개수와 메모리가 평평하게 유지되는지 본다.
+    # 24시간 소크는 CHA_SOAK_SECONDS=86400 으로 실행
+    seconds = int(os.environ.get("CHA_SOAK_SECONDS", "10"))
+    cha.BUBBLE_LIFETIME = 300
+    cha.SPEECH_SECONDS = 10 ** 6
+    swarm = CharacterSwarm(characters)
+    swarm.show()
+    chatter = QTimer()
+    chatter.timeout.connect(lambda: random.choice(swarm.characters).say_hello())
+    chatter.start(5)
+    rows = []
+    for elapsed in range(0, seconds + 1, max(1, seconds // 10)):
+        if elapsed:
+            run_event_loop(app, max(1, seconds // 10))
+        QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        windows = len(QApplication.topLevelWidgets())
+        rows.append({"sec": elapsed, "windows": windows, "active": len(bubble_pool.active),
+                     "idle": len(bubble_pool.idle), "rss_kb": rss_kb()})
+    chatter.stop()
+    bubble_pool.clear()
+    close_all(swarm.characters)
+    return rows
+
+
+def bench_overlay(app, counts=(1, 10, 100, 1000)):
+    # 캐릭터마다 창을 띄우는 방식과 화면당 오버레이 하나에 그리는 방식 비교 (틱 비용에 페인트 포함)
+    cha.SPEECH_SECONDS = 10 ** 6
+
+    def tick_and_paint(tick):
+        tick()
+        app.processEvents()
+
+    rows = []
+    for count in counts:
+        swarm = CharacterSwarm(count)
+        swarm.show()
+        window_count = sum(widget.isVisible() for widget in QApplication.topLevelWidgets())
+        swarm_cpu = run_event_loop(app, 2)
+        scheduler.set_active(swarm.move_job, False)
+        swarm_tick = time_ticks(lambda: tick_and_paint(swarm.tick), 50)
+        close_all(swarm.characters)
+
+        compositor = Compositor(count)
+        compositor.show()
+        overlay_count = len(compositor.overlays)
+        overlay_cpu = run_event_loop(app, 2)
+        scheduler.set_active(compositor.move_job, False)
+        overlay_tick = time_ticks(lambda: tick_and_paint(compositor.tick), 50)
+        compositor.hide()
+        close_all(compositor.overlays)
+
+        rows.append({"n": count, "windows": window_count, "windows_us_per_tick": swarm_tick,
+                     "windows_cpu_pct": swarm_cpu, "overlays": overlay_count,
+                     "overlay_us_per_tick": overlay_tick, "overlay_cpu_pct": overlay_cpu})
+    return rows
+
+
+def bench_sim(app, counts=(1, 10, 100, 1000), ticks=1000):
+    # Qt 없이 시뮬레이션 코어만 돌린다. 같은 시드면 결과가 같아야 한다
+    rows = []
+    for count in counts:
+        simulation = Simulation(count, seed=0)
+        start = time.perf_counter()
+        simulation.run(ticks)
+        sim_rate = ticks / (time.perf_counter() - start)
+        replay = Simulation(count, seed=0)
+        replay.run(ticks)
+
+        swarm = Swarm(seed=0)
+        for mover in simulation.movers:
+            swarm.add(mover.x, mover.y, mover.speed_x, mover.speed_y, mover.max_x, mover.max_y)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            swarm.step()
+        swarm_rate = ticks / (time.perf_counter() - start)
+        rows.append({"n": count, "sim_ticks_per_sec": sim_rate, "swarm_ticks_per_sec": swarm_rate,
+                     "deterministic": simulation.state() == replay.state()})
+    return rows
+
+
+def bench_collision(app, counts=(10, 100, 1000, 3000), ticks=100):
+    # 격자 해시와 전체 쌍 비교의 겹침 검사 비용. 두 결과의 쌍 집합은 같아야 한다.
+    # "scaled"는 상자가 화면 넓이의 1/4을 덮도록 나란한 두 화면을 N에 맞춰 키우고,
+    # "1080p"는 화면 하나에 N마리를 모두 넣는다. 마지막 열은 같은 화면에서 충돌을 켠 swarm 틱 비용
+    rows = []
+    for layout in ("scaled", "1080p"):
+        for count in counts:
+            if layout == "scaled":
+                side = max(1080, int((count * cha.CHARACTER_SIZE ** 2 * 2) ** 0.5))
+                world = World([(0, 0, side, side), (side, 0, side, side)])
+            else:
+                world = World([(0, 0, 1920, 1080)])
+            rng = random.Random(0)
+            points = [world.random_position(cha.CHARACTER_BOX, rng) for _ in range(count)]
+            repeats = max(1, 3000 // count)
+            grid_us = time_ticks(lambda: overlapping_pairs(points, cha.CHARACTER_SIZE), repeats)
+            naive_us = time_ticks(lambda: naive_pairs(points, cha.CHARACTER_SIZE), 1 if count >= 1000 else repeats)
+            same = set(overlapping_pairs(points, cha.CHARACTER_SIZE)) == set(naive_pairs(points, cha.CHARACTER_SIZE))
+
+            swarm = Swarm(seed=0)
+            swarm.set_world(world, cha.CHARACTER_BOX)
+            swarm.collide = cha.CHARACTER_SIZE
+            min_x, min_y, max_x, max_y = world.limits(cha.CHARACTER_BOX)
+            for x, y in points:
+                swarm.add(x, y, rng.choice([-3, 3]), rng.choice([-3, 3]), max_x, max_y, min_x, min_y)
+            swarm_us = time_ticks(swarm.step, ticks)
+            rows.append({"world": layout, "n": count, "grid_us": grid_us, "naive_us": naive_us,
+                         "same_pairs": same, "swarm_collide_us_per_tick": swarm_us})
+    return rows
+
+
+def measure_allocations(tick, ticks=100):
+    tick()
+    tracemalloc.start()
+    peak = 0
+    blocks = sys.getallocatedblocks()
+    for _ in range(ticks):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        tick()
+        peak += tracemalloc.get_traced_memory()[1] - current
+    blocks = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+    return peak / ticks, blocks / ticks
+
+
+def bench_alloc(app, count=100):
+    # 틱 하나가 잡는 임시 메모리(피크 바이트)와 남기는 블록 수
+    cha.SPEECH_SECONDS = 10 ** 6
+    simulation = Simulation(count, seed=0)
+    characters = [DesktopCharacter() for _ in range(count)]
+    for character in characters:
+        character.show()
+        scheduler.set_active(character.move_job, False)
+    swarm = CharacterSwarm(count)
+    swarm.show()
+    scheduler.set_active(swarm.move_job, False)
+    compositor = Compositor(count)
+    compositor.show()
+    scheduler.set_active(compositor.move_job, False)
+    paths = {
+        "sim": simulation.step,
+        "widget": lambda: [c.wander_around() for c in characters],
+        "swarm": swarm.tick,
+        "overlay": compositor.tick,
+    }
+    rows = []
+    for name, tick in paths.items():
+        peak, blocks = measure_allocations(tick)
+        rows.append({"path": name, "n": count, "peak_bytes_per_tick": peak, "net_blocks_per_tick": blocks})
+    close_all(characters + swarm.characters)
+    compositor.hide()
+    close_all(compositor.overlays)
+    return rows
+
+
+STARTUP_SCRIPT = '''
+import time
+started = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+app = QApplication([])
+import cha
+from assets import image_registry
+cha.DesktopCharacter().show()
+app.processEvents()
+first_frame = time.perf_counter() - started
+while image_registry.image(cha.CHARACTER_IMAGE, cha.CHARACTER_SIZE, cha.CHARACTER_FRAMES) is None:
+    app.processEvents()
+    time.sleep(0.001)
+app.processEvents()
+print(first_frame * 1000, (time.perf_counter() - started) * 1000)
+'''
+
+
+def bench_startup(app, runs=5):
+    # 인터프리터 시작부터 첫 프레임(이모지)과 캐릭터 이미지 표시까지. 디스크 캐시가 빈 경우와 찬 경우
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, CHA_CACHE_DIR=cache_dir)
+        for cache in ("cold", "warm"):
+            samples = []
+            for _ in range(runs):
+                if cache == "cold":
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                start = time.perf_counter()
+                output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=HERE, env=env, check=True,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+                total = (time.perf_counter() - start) * 1000
+                first_frame, sprites_ready = map(float, output.split())
+                samples.append((total, first_frame, sprites_ready))
+            rows.append({
+                "cache": cache,
+                "process_ms": statistics.median(s[0] for s in samples),
+                "first_frame_ms": statistics.median(s[1] for s in samples),
+                "sprites_ready_ms": statistics.median(s[2] for s in samples),
+            })
+    return rows
+
+
+def bench_metrics(app, count=100):
+    # 측정이 꺼져 있을 때와 켜져 있을 때 스케줄러 틱 + 말풍선 페인트 비용
+    cha.SPEECH_SECONDS = 10 ** 6
+    characters = [DesktopCharacter() for _ in range(count)]
+    for character in characters:
+        character.show()
+    bubble = cha.SpeechBubble()
+    bubble.message = "저랑 놀아줄래요?"
+    image = QImage(BUBBLE_WIDTH, BUBBLE_HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    rows = []
+    for enabled in (False, True):
+        metrics.enabled = enabled
+        tick = time_ticks(scheduler.tick)
+        paint = time_ticks(lambda: bubble.render(image), 500)
+        rows.append({"metrics": enabled, "n": count, "tick_us": tick, "bubble_paint_us": paint})
+    metrics.enabled = False
+    bubble.deleteLater()
+    close_all(characters)
+    return rows
+
+
+def print_table(rows):
+    columns = list(rows[0])
+    widths = [max(10, len(column)) for column in columns]
+    print("  ".join(f"{column:>{width}}" for column, width in zip(columns, widths)))
+    for row in rows:
+        cells = [f"{row[c]:.1f}" if isinstance(row[c], float) else str(row[c]) for c in columns]
+        print("  ".join(f"{cell:>{width}}" for cell, width in zip(cells, widths)))
+
+
+BENCHMARKS = {
+    "swarm": bench_swarm,
+    "bubble": bench_bubble,
+    "soak": bench_soak,
+    "overlay": bench_overlay,
+    "sim": bench_sim,
+    "collision": bench_collision,
+    "alloc": bench_alloc,
+    "startup": bench_startup,
+    "metrics": bench_metrics,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help=", ".join(BENCHMARKS))
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+    app = QApplication(sys.argv[:1])
+    image_registry.load_now(cha.CHARACTER_IMAGE, cha.CHARACTER_SIZE, cha.CHARACTER_FRAMES)
+    results = {}
+    for name in args.names or [name for name in BENCHMARKS if name != "soak"]:
+        print(f"== {name}")
+        results[name] = BENCHMARKS[name](app)
+        print_table(results[name])
+    if args.json:
+        report = {
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": QApplication.platformName(),
+            "machine": platform.platform(),
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
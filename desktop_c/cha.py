@@ -1,19 +1,81 @@
+import time
+STARTED = time.perf_counter()  # 첫 프레임까지의 시간 측정 기준. 다른 import보다 먼저 잰다
+
 import sys
+import json
+import math
 import random
 import os
 import platform
-from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QMenu, QSystemTrayIcon
-from PyQt5.QtCore import Qt, QTimer, QPoint
-from PyQt5.QtGui import QPixmap, QFont, QPainter, QColor, QTransform, QIcon
+from functools import lru_cache
+from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QMenu, QMessageBox, QSystemTrayIcon
+from PyQt5.QtCore import Qt, QObject, QTimer, QPoint, QRect, pyqtSignal
+from PyQt5.QtGui import QPixmap, QFont, QPainter, QColor, QIcon, QRegion, QStaticText, QTextOption
+from sim import Mover, SPEEDS
+from world import World, SpatialHash
+from instrument import metrics, METRICS_FILE, METRICS_INTERVAL
+from sprites import sprite_cache
+from assets import image_registry, asset_path
+from scheduler import scheduler, TICK_INTERVAL
+
+CHARACTER_IMAGE = asset_path("character.png")
+CHARACTER_SIZE = 120
+CHARACTER_BOX = 150
+CHARACTER_FRAMES = 1
+FRAME_TICKS = 4
+TICK_SECONDS = TICK_INTERVAL / 1000
+SPEECH_SECONDS = 10
+BUBBLE_WIDTH = 180
+BUBBLE_HEIGHT = 60
+BUBBLE_LIFETIME = 3000
+MAX_BUBBLES = 8
+MAX_IDLE_BUBBLES = 4
+MESSAGES = ["저랑 놀아줄래요?", "심심해요 ㅠㅠ "]
+
+SEED = int(os.environ["CHA_SEED"]) if "CHA_SEED" in os.environ else None
+# 캐릭터끼리 부딪혀 튕기기 (스웜/오버레이 모드). 많이 겹칠수록 틱이 비싸지므로 CHA_COLLIDE=1일 때만 켠다
+COLLIDE = os.environ.get("CHA_COLLIDE") == "1"
+rng = random.Random(SEED)
+
+class WorldModel(QObject):
+    # 모든 화면의 사용 가능 영역으로 World를 만들고, 화면 구성이 바뀌면 다시 만든다
+    changed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.world = None
+
+    def current(self):
+        if self.world is None:
+            app = QApplication.instance()
+            app.screenAdded.connect(self.watch_screen)
+            app.screenRemoved.connect(self.rebuild)
+            for screen in app.screens():
+                screen.availableGeometryChanged.connect(self.rebuild)
+            self.rebuild()
+        return self.world
+
+    def watch_screen(self, screen):
+        screen.availableGeometryChanged.connect(self.rebuild)
+        self.rebuild()
+
+    def rebuild(self, *args):
+        screens = [screen.availableGeometry() for screen in QApplication.screens()]
+        self.world = World([(r.x(), r.y(), r.width(), r.height()) for r in screens])
+        self.changed.emit()
+
+world_model = WorldModel()
 
 if platform.system() == "Windows":
     import ctypes
     ctypes.windll.kernel32.SetThreadExecutionState(0x80000002)
 
 class DesktopCharacter(QWidget):
-    def __init__(self):
+    moved = pyqtSignal()
+
+    def __init__(self, swarm=None):
         super().__init__()
-        self.bubbles = []
+        self.swarm = swarm
         self.setup_window()
         self.load_character()
         self.setup_movement()
@@ -22,95 +84,103 @@ class DesktopCharacter(QWidget):
     def setup_window(self):
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        screen = QApplication.desktop().screenGeometry()
-        self.screen_width = screen.width()
-        self.screen_height = screen.height()
-        self.char_width = 150
-        self.char_height = 150
+        self.char_width = CHARACTER_BOX
+        self.char_height = CHARACTER_BOX
         self.setFixedSize(self.char_width, self.char_height)
-        start_x = random.randint(0, self.screen_width - self.char_width)
-        start_y = random.randint(0, self.screen_height - self.char_height)
-        self.move(start_x, start_y)
-        self.speed_x = random.choice([-3, -2, -1, 1, 2, 3])
-        self.speed_y = random.choice([-3, -2, -1, 1, 2, 3])
+        self.mover = Mover.spawn_in(world_model.current(), self.char_width, rng)
+        self.move(int(self.mover.x), int(self.mover.y))
+        world_model.changed.connect(self.update_world)
+
+    def update_world(self):
+        if self.swarm is not None:
+            # 스웜 모드에서 mover는 속도만 따라가므로 현재 위치는 창에서 가져온다
+            self.mover.x, self.mover.y = self.x(), self.y()
+        self.mover.set_world(world_model.current(), self.char_width)
+        self.move(int(self.mover.x), int(self.mover.y))
+        self.update_jobs()
 
     def load_character(self):
+        # 이미지는 백그라운드에서 로딩하고, 준비될 때까지는 이모지를 보여준다
         self.label = QLabel(self)
         self.label.setAlignment(Qt.AlignCenter)
-        try:
-            self.original_pixmap = QPixmap("character.png")
-            if not self.original_pixmap.isNull():
-                self.original_pixmap = self.original_pixmap.scaled(120, 120, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.label.setPixmap(self.original_pixmap)
-                self.has_image = True
-                self.facing_right = True
-            else:
-                raise FileNotFoundError
-        except FileNotFoundError:
-            self.label.setText("🐱")
-            self.label.setFont(QFont("Arial", 36))
-            self.label.setStyleSheet("color: black; background: transparent;")
-            self.has_image = False
-            self.facing_right = True
+        self.label.setText("🐱")
+        self.label.setFont(QFont("Arial", 36))
+        self.label.setStyleSheet("color: black; background: transparent;")
         self.label.setGeometry(15, 15, 120, 120)
+        self.frame = 0
+        self.tick_count = 0
+        self.has_image = False
+        if not self.apply_sprites():
+            image_registry.ready.connect(self.apply_sprites)
+            image_registry.load(CHARACTER_IMAGE, CHARACTER_SIZE, CHARACTER_FRAMES)
+
+    def apply_sprites(self, path=None):
+        if self.has_image:
+            return True
+        self.sprites = sprite_cache.frames(CHARACTER_IMAGE, CHARACTER_SIZE, CHARACTER_FRAMES)
+        if self.sprites[0][0].isNull():
+            return False
+        self.has_image = True
+        self.show_sprite()
+        return True
 
     def setup_movement(self):
         self.auto_move_enabled = True
         self.is_dragging = False
-        self.move_timer = QTimer()
-        self.move_timer.timeout.connect(self.wander_around)
-        self.move_timer.start(50)
+        if self.swarm is not None:
+            self.swarm_index = self.swarm.add(self)
+            self.move_job = None
+        else:
+            self.move_job = scheduler.add(self.wander_around)
 
     def setup_interactions(self):
         self.setMouseTracking(True)
         self.drag_start_position = QPoint()
-        self.speech_timer = QTimer()
-        self.speech_timer.timeout.connect(self.say_hello)
-        self.speech_timer.start(10000)
+        self.speech_job = scheduler.add(self.say_hello, SPEECH_SECONDS)
+        # 닫힌 창도 트레이에서 다시 보일 수 있으므로 작업은 위젯이 실제로 지워질 때 뺀다
+        jobs = [job for job in (self.move_job, self.speech_job) if job is not None]
+        self.destroyed.connect(lambda: [scheduler.remove(job) for job in jobs])
+
+    def update_jobs(self):
+        # 숨겨져 있거나 멈춤/드래그 중이면 스케줄러에서 해당 작업을 쉬게 한다
+        visible = self.isVisible()
+        if self.swarm is not None:
+            self.swarm.sync(self)
+        else:
+            scheduler.set_active(self.move_job, visible and self.auto_move_enabled and not self.is_dragging)
+        scheduler.set_active(self.speech_job, visible)
 
-    def wander_around(self):
+    def wander_around(self, dt=TICK_SECONDS):
         if not self.is_dragging and self.auto_move_enabled:
-            current_pos = self.pos()
-            new_x = current_pos.x() + self.speed_x
-            new_y = current_pos.y() + self.speed_y
-            if new_x <= 0 or new_x >= self.screen_width - self.char_width:
-                self.speed_x = -self.speed_x
-                new_x = max(0, min(self.screen_width - self.char_width, new_x))
-            if new_y <= 0 or new_y >= self.screen_height - self.char_height:
-                self.speed_y = -self.speed_y
-                new_y = max(0, min(self.screen_height - self.char_height, new_y))
+            # 속도는 50ms 틱당 픽셀 단위이고, 실제 이동량은 경과 시간으로 계산한다
+            self.mover.step(dt / TICK_SECONDS)
             self.update_character_direction()
-            if random.random() < 0.03:
-                self.speed_x = random.choice([-4, -3, -2, -1, 1, 2, 3, 4])
-                self.speed_y = random.choice([-4, -3, -2, -1, 1, 2, 3, 4])
-            self.move(int(new_x), int(new_y))
+            if self.has_image and CHARACTER_FRAMES > 1:
+                self.step_frame()
+            self.move(int(self.mover.x), int(self.mover.y))
             self.raise_()
 
     def update_character_direction(self):
-        if self.has_image:
-            should_face_right = self.speed_x > 0
-            if should_face_right != self.facing_right:
-                self.facing_right = should_face_right
-                if self.facing_right:
-                    self.label.setPixmap(self.original_pixmap)
-                else:
-                    transform = QTransform()
-                    transform.scale(-1, 1)
-                    flipped_pixmap = self.original_pixmap.transformed(transform)
-                    self.label.setPixmap(flipped_pixmap)
-        else:
-            if self.speed_x > 0:
-                if not self.facing_right:
-                    self.label.setText("🐱")
-                    self.facing_right = True
+        if self.mover.turn():
+            if self.has_image:
+                self.show_sprite()
             else:
-                if self.facing_right:
-                    self.label.setText("🐾")
-                    self.facing_right = False
+                self.label.setText("🐱" if self.mover.facing_right else "🐾")
+
+    def show_sprite(self):
+        right, left = self.sprites
+        self.label.setPixmap((right if self.mover.facing_right else left)[self.frame])
+
+    def step_frame(self):
+        self.tick_count += 1
+        if self.tick_count % FRAME_TICKS == 0:
+            self.frame = (self.frame + 1) % CHARACTER_FRAMES
+            self.show_sprite()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.is_dragging = True
+            self.update_jobs()
             self.drag_start_position = event.globalPos() - self.frameGeometry().topLeft()
             QTimer.singleShot(3000, self.end_drag)
         elif event.button() == Qt.RightButton:
@@ -119,127 +189,633 @@ class DesktopCharacter(QWidget):
     def mouseMoveEvent(self, event):
         if event.buttons() == Qt.LeftButton and self.is_dragging:
             new_pos = event.globalPos() - self.drag_start_position
-            new_x = max(0, min(self.screen_width - self.char_width, new_pos.x()))
-            new_y = max(0, min(self.screen_height - self.char_height, new_pos.y()))
-            self.move(new_x, new_y)
+            self.mover.place(new_pos.x(), new_pos.y())
+            self.move(int(self.mover.x), int(self.mover.y))
 
     def mouseDoubleClickEvent(self, event):
         self.say_hello()
 
     def end_drag(self):
         self.is_dragging = False
-        self.speed_x = random.choice([-4, -3, -2, -1, 1, 2, 3, 4])
-        self.speed_y = random.choice([-4, -3, -2, -1, 1, 2, 3, 4])
+        self.mover.steer()
         self.update_character_direction()
+        self.update_jobs()
 
     def show_context_menu(self, position):
-        menu = QMenu(self)
-        menu.setStyleSheet("""
-            QMenu {
-                background-color: rgba(255, 255, 255, 230);
-                border: 1px solid gray;
-                border-radius: 5px;
-            }
-            QMenu::item {
-                padding: 5px 20px;
-            }
-            QMenu::item:selected {
-                background-color: rgba(100, 150, 255, 100);
-            }
-        """)
-        hello_action = menu.addAction("안녕! 👋")
-        hello_action.triggered.connect(self.say_hello)
-        if self.auto_move_enabled:
-            pause_action = menu.addAction("멈추! ⏸️")
-            pause_action.triggered.connect(self.pause_movement)
-        else:
-            resume_action = menu.addAction("다시 돌아다니기 ▶️")
-            resume_action.triggered.connect(self.resume_movement)
-        menu.addSeparator()
-        quit_action = menu.addAction("종료 ❌")
-        quit_action.triggered.connect(self.close)
-        menu.exec_(position)
+        show_character_menu(self, position, self)
 
     def say_hello(self):
-        messages = [ "저랑 놀아줄래요?" , "심심해요 ㅠㅠ "]
-        message = random.choice(messages)
-        bubble = SpeechBubble(message, self)
-        self.bubbles.append(bubble)
-        bubble.show()
-        QTimer.singleShot(3000, lambda: self.remove_bubble(bubble))
+        bubble_pool.acquire(rng.choice(MESSAGES), self)
 
-    def remove_bubble(self, bubble):
-        if bubble in self.bubbles:
-            self.bubbles.remove(bubble)
-        bubble.close()
+    def moveEvent(self, event):
+        self.moved.emit()
+
+    def showEvent(self, event):
+        self.update_jobs()
+
+    def hideEvent(self, event):
+        bubble_pool.release_owner(self)
+        self.update_jobs()
+
+    def closeEvent(self, event):
+        # 닫기는 숨기기와 같다. 작업은 hideEvent에서 쉬게 되고 다시 보이면 이어진다
+        bubble_pool.release_owner(self)
+        super().closeEvent(event)
 
     def pause_movement(self):
         self.auto_move_enabled = False
+        self.update_jobs()
 
     def resume_movement(self):
         self.auto_move_enabled = True
+        self.update_jobs()
+
+class CharacterSwarm:
+    def __init__(self, count):
+        # numpy는 스웜/오버레이 모드에서만 필요하므로 여기서 불러온다
+        from swarm import Swarm
+        self.swarm = Swarm(SEED)
+        self.swarm.set_world(world_model.current(), CHARACTER_BOX)
+        self.swarm.collide = CHARACTER_SIZE if COLLIDE else 0
+        self.characters = []
+        self.move_job = scheduler.add(self.tick)
+        world_model.changed.connect(self.update_world)
+        for _ in range(count):
+            self.characters.append(DesktopCharacter(self))
+
+    def add(self, character):
+        mover = character.mover
+        return self.swarm.add(mover.x, mover.y, mover.speed_x, mover.speed_y,
+                              mover.max_x, mover.max_y, mover.min_x, mover.min_y)
+
+    def update_world(self):
+        self.swarm.set_world(world_model.current(), CHARACTER_BOX)
+        for character, (x, y) in zip(self.characters, self.swarm.pos.astype(int).tolist()):
+            character.move(x, y)
+
+    def sync(self, character):
+        i = character.swarm_index
+        pos = character.pos()
+        self.swarm.pos[i] = (pos.x(), pos.y())
+        self.swarm.vel[i] = (character.mover.speed_x, character.mover.speed_y)
+        self.swarm.active[i] = character.isVisible() and character.auto_move_enabled and not character.is_dragging
+        scheduler.set_active(self.move_job, bool(self.swarm.active.any()))
+
+    def tick(self, dt=TICK_SECONDS):
+        moved, steered = self.swarm.step(dt / TICK_SECONDS)
+        characters = self.characters
+        for i, (speed_x, speed_y) in zip(steered.tolist(), self.swarm.vel[steered].astype(int).tolist()):
+            character = characters[i]
+            character.mover.speed_x, character.mover.speed_y = speed_x, speed_y
+            character.update_character_direction()
+        for i, (x, y) in zip(moved.tolist(), self.swarm.pos[moved].astype(int).tolist()):
+            characters[i].move(x, y)
+        if CHARACTER_FRAMES > 1:
+            for i in moved.tolist():
+                if characters[i].has_image:
+                    characters[i].step_frame()
+
+    def show(self):
+        for character in self.characters:
+            character.show()
+
+    def hide(self):
+        for character in self.characters:
+            character.hide()
+
+    def isVisible(self):
+        return any(character.isVisible() for character in self.characters)
 
 class SpeechBubble(QWidget):
-    def __init__(self, message, char_widget):
+    def __init__(self):
         super().__init__()
-        self.message = message
-        self.char_widget = char_widget
+        self.message = ""
+        self.char_widget = None
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setFixedSize(180, 60)
-        self.follow_timer = QTimer(self)
-        self.follow_timer.timeout.connect(self.follow_character)
-        self.follow_timer.start(30)
+        self.setFixedSize(BUBBLE_WIDTH, BUBBLE_HEIGHT)
+        self.expire_timer = QTimer(self)
+        self.expire_timer.setSingleShot(True)
+        self.expire_timer.timeout.connect(lambda: bubble_pool.release(self))
+
+    def attach(self, message, char_widget):
+        # 타이머로 위치를 확인하지 않고, 캐릭터가 실제로 움직일 때 moved 시그널로만 따라간다
+        if self.char_widget is not char_widget:
+            self.detach()
+            self.char_widget = char_widget
+            char_widget.moved.connect(self.follow_character)
+        self.message = message
         self.follow_character()
+        self.update()
+        self.expire_timer.start(BUBBLE_LIFETIME)
+
+    def detach(self):
+        self.expire_timer.stop()
+        bubble_space.remove(self)
+        if self.char_widget is not None:
+            self.char_widget.moved.disconnect(self.follow_character)
+            self.char_widget = None
+        self.hide()
 
     def follow_character(self):
         char_pos = self.char_widget.pos()
-        bubble_x = char_pos.x() + (self.char_widget.width() // 2) - (self.width() // 2)
-        bubble_y_above = char_pos.y() - self.height() - 10
-        bubble_y_below = char_pos.y() + self.char_widget.height() + 10
-        if bubble_y_above <= 0:
-            self.move(bubble_x, bubble_y_below)
-        else:
-            self.move(bubble_x, bubble_y_above)
+        self.move(*place_bubble(self, char_pos.x(), char_pos.y(), self.char_widget.width(), self.char_widget.height()))
 
     def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        with metrics.timed("SpeechBubble.paintEvent"):
+            painter = QPainter(self)
+            painter.drawPixmap(0, 0, render_bubble(self.message, self.devicePixelRatioF()))
+
+class BubblePool:
+    def __init__(self, max_bubbles=MAX_BUBBLES, max_idle=MAX_IDLE_BUBBLES):
+        self.max_bubbles = max_bubbles
+        self.max_idle = max_idle
+        self.active = []
+        self.idle = []
+
+    def acquire(self, message, char_widget):
+        # 캐릭터당 말풍선은 하나만 두고, 전체 개수가 상한을 넘으면 가장 오래된 것을 회수한다
+        bubble = next((b for b in self.active if b.char_widget is char_widget), None)
+        if bubble is None:
+            if len(self.active) >= self.max_bubbles:
+                self.release(self.active[0])
+            if self.idle:
+                bubble = self.idle.pop()
+            else:
+                bubble = SpeechBubble()
+                metrics.count("bubbles.created")
+        else:
+            self.active.remove(bubble)
+        self.active.append(bubble)
+        bubble.attach(message, char_widget)
+        bubble.show()
+        return bubble
+
+    def release(self, bubble):
+        if bubble not in self.active:
+            return
+        self.active.remove(bubble)
+        bubble.detach()
+        if len(self.idle) < self.max_idle:
+            self.idle.append(bubble)
+        else:
+            bubble.deleteLater()
+            metrics.count("bubbles.deleted")
+
+    def release_owner(self, char_widget):
+        for bubble in [b for b in self.active if b.char_widget is char_widget]:
+            self.release(bubble)
+
+    def clear(self):
+        for bubble in self.active + self.idle:
+            bubble.detach()
+            bubble.deleteLater()
+        self.active = []
+        self.idle = []
+
+bubble_pool = BubblePool()
+bubble_space = SpatialHash(BUBBLE_WIDTH)
+metrics.gauge("bubbles.active", lambda: len(bubble_pool.active))
+metrics.gauge("bubbles.idle", lambda: len(bubble_pool.idle))
+metrics.gauge("windows", lambda: sum(w.isVisible() for w in QApplication.topLevelWidgets()))
+metrics.gauge("windows.alive", lambda: len(QApplication.topLevelWidgets()))
+metrics.gauge("scheduler.jobs.active", lambda: sum(job.active for job in scheduler.jobs))
+metrics.gauge("scheduler.tick_interval_ms", lambda: scheduler.tick_interval)
+
+def show_character_menu(character, position, parent=None):
+    menu = QMenu(parent)
+    menu.setStyleSheet("""
+        QMenu {
+            background-color: rgba(255, 255, 255, 230);
+            border: 1px solid gray;
+            border-radius: 5px;
+        }
+        QMenu::item {
+            padding: 5px 20px;
+        }
+        QMenu::item:selected {
+            background-color: rgba(100, 150, 255, 100);
+        }
+    """)
+    hello_action = menu.addAction("안녕! 👋")
+    hello_action.triggered.connect(character.say_hello)
+    if character.auto_move_enabled:
+        pause_action = menu.addAction("멈추! ⏸️")
+        pause_action.triggered.connect(character.pause_movement)
+    else:
+        resume_action = menu.addAction("다시 돌아다니기 ▶️")
+        resume_action.triggered.connect(character.resume_movement)
+    if QApplication.keyboardModifiers() & Qt.ShiftModifier:
+        metrics_action = menu.addAction("통계 📊")
+        metrics_action.triggered.connect(lambda: show_metrics(parent))
+    menu.addSeparator()
+    quit_action = menu.addAction("종료 ❌")
+    quit_action.triggered.connect(character.close)
+    menu.exec_(position)
+
+def show_metrics(parent=None):
+    # Shift+우클릭 메뉴에서만 보이는 숨은 항목. 꺼져 있으면 여기서 측정을 켠다
+    if not metrics.enabled:
+        metrics.enable()
+        QMessageBox.information(parent, "통계", "측정을 시작했어요. 잠시 후 다시 열어 보세요.")
+        return
+    QMessageBox.information(parent, "통계", json.dumps(metrics.snapshot(), indent=2))
+
+startup_times = {}
+metrics.gauge("startup_ms", lambda: dict(startup_times))
+
+def mark_startup(name):
+    if name in startup_times:
+        return
+    # 결과는 metrics 스냅샷(startup_ms 게이지)과 덤프 파일로만 내보낸다
+    startup_times[name] = (time.perf_counter() - STARTED) * 1000
+
+def dump_metrics():
+    metrics.dump(METRICS_FILE)
+
+def bubble_candidates(char_x, char_y, char_width, char_height):
+    screen_top = world_model.current().nearest_screen(char_x + char_width // 2, char_y + char_height // 2)[1]
+    bubble_x = char_x + (char_width // 2) - (BUBBLE_WIDTH // 2)
+    bubble_y_above = char_y - BUBBLE_HEIGHT - 10
+    bubble_y_below = char_y + char_height + 10
+    if bubble_y_above <= screen_top:
+        rows = [bubble_y_below, bubble_y_above]
+    else:
+        rows = [bubble_y_above, bubble_y_below]
+    shift = BUBBLE_WIDTH // 2 + 10
+    return [(bubble_x + dx, y) for dx in (0, -shift, shift) for y in rows]
+
+def place_bubble(key, char_x, char_y, char_width, char_height):
+    # 위/아래, 그다음 좌우로 비켜선 자리 중 다른 말풍선과 겹치지 않는 첫 자리를 고른다
+    candidates = bubble_candidates(char_x, char_y, char_width, char_height)
+    bubble_space.remove(key)
+    bubble_x, bubble_y = next((c for c in candidates if not bubble_space.query(*c, BUBBLE_WIDTH, BUBBLE_HEIGHT)),
+                              candidates[0])
+    bubble_space.insert(key, bubble_x, bubble_y, BUBBLE_WIDTH, BUBBLE_HEIGHT)
+    return bubble_x, bubble_y
+
+@lru_cache(maxsize=None)
+def bubble_font():
+    font = QFont("Segoe Print", 11, QFont.Bold)
+    if not QFont("Segoe Print").exactMatch():
+        font = QFont("Arial Rounded MT Bold", 11, QFont.Bold)
+    return font
+
+@lru_cache(maxsize=None)
+def emoji_font():
+    return QFont("Arial", 36)
+
+@lru_cache(maxsize=64)
+def render_bubble(message, ratio=1.0):
+    # 말풍선 그림은 메시지마다 한 번만 그리고, paintEvent는 이 픽스맵을 복사만 한다
+    pixmap = QPixmap(int(BUBBLE_WIDTH * ratio), int(BUBBLE_HEIGHT * ratio))
+    pixmap.setDevicePixelRatio(ratio)
+    pixmap.fill(Qt.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    bubble_color = QColor(240, 255, 245, 240)    # 화이트+민트 섞인 느낌 (배경)
+    border_color = QColor(152, 251, 152)         # Pale Green
+    shadow_color = QColor(34, 139, 34, 30)       # Forest Green 그림자
+
+    painter.setBrush(shadow_color)
+    painter.setPen(Qt.NoPen)
+    painter.drawRoundedRect(12, 12, 160, 50, 15, 15)
+
+    painter.setBrush(bubble_color)
+    painter.setPen(border_color)
+    painter.drawRoundedRect(10, 10, 160, 50, 15, 15)
+
+    painter.setPen(QColor(50, 90, 50))
+    painter.setFont(bubble_font())
+    text = QStaticText(message)
+    text.setTextWidth(150)
+    option = QTextOption(Qt.AlignCenter)
+    option.setWrapMode(QTextOption.WordWrap)
+    text.setTextOption(option)
+    text.prepare(font=bubble_font())
+    painter.drawStaticText(15, int(20 + (40 - text.size().height()) / 2), text)
+    painter.end()
+    return pixmap
+
+class OverlayCharacter:
+    def __init__(self, compositor, index):
+        self.compositor = compositor
+        self.index = index
+        self.visible = True
+        self.auto_move_enabled = True
+        self.is_dragging = False
+        self.message = None
+        self.expires = 0.0
+        self.drawn_rect = QRect()
+        self.bubble_at = (0, 0)
+        self.load_sprites()
+        self.speech_job = scheduler.add(self.say_hello, SPEECH_SECONDS)
+
+    def load_sprites(self):
+        self.sprites = sprite_cache.frames(CHARACTER_IMAGE, CHARACTER_SIZE, CHARACTER_FRAMES)
+        self.has_image = not self.sprites[0][0].isNull()
+
+    def rect(self):
+        x, y = self.compositor.positions[self.index]
+        return QRect(x, y, CHARACTER_BOX, CHARACTER_BOX)
+
+    def bubble_rect(self):
+        return QRect(self.bubble_at[0], self.bubble_at[1], BUBBLE_WIDTH, BUBBLE_HEIGHT)
+
+    def bounds(self):
+        if not self.visible:
+            return QRect()
+        if self.message is None:
+            return self.rect()
+        return self.rect().united(self.bubble_rect())
+
+    def say_hello(self):
+        self.compositor.say(self, rng.choice(MESSAGES))
 
-        bubble_color = QColor(240, 255, 245, 240)    # 화이트+민트 섞인 느낌 (배경)
-        border_color = QColor(152, 251, 152)         # Pale Green
-        shadow_color = QColor(34, 139, 34, 30)       # Forest Green 그림자
+    def end_drag(self):
+        self.is_dragging = False
+        self.compositor.swarm.vel[self.index] = (rng.choice(SPEEDS), rng.choice(SPEEDS))
+        self.compositor.sync(self)
 
+    def pause_movement(self):
+        self.auto_move_enabled = False
+        self.compositor.sync(self)
 
-        painter.setBrush(shadow_color)
-        painter.setPen(Qt.NoPen)
-        painter.drawRoundedRect(12, 12, 160, 50, 15, 15)
+    def resume_movement(self):
+        self.auto_move_enabled = True
+        self.compositor.sync(self)
 
-        painter.setBrush(bubble_color)
-        painter.setPen(border_color)
-        painter.drawRoundedRect(10, 10, 160, 50, 15, 15)
+    def close(self):
+        # 창 모드처럼 다음 show()까지만 숨긴다
+        self.visible = False
+        self.message = None
+        self.compositor.sync(self)
 
-        painter.setPen(QColor(50, 90, 50))  
+class Overlay(QWidget):
+    def __init__(self, compositor, screen):
+        super().__init__()
+        self.compositor = compositor
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.setGeometry(screen.geometry())
 
-        font = QFont("Segoe Print", 11, QFont.Bold)
-        if not QFont("Segoe Print").exactMatch():
-            font = QFont("Arial Rounded MT Bold", 11, QFont.Bold)
-        painter.setFont(font)
-        painter.drawText(15, 20, 150, 40, Qt.AlignCenter | Qt.TextWordWrap, self.message)
+    def paintEvent(self, event):
+        with metrics.timed("Overlay.paintEvent"):
+            painter = QPainter(self)
+            origin = self.geometry().topLeft()
+            area = event.region().translated(origin)
+            painter.translate(-origin)
+            self.compositor.paint(painter, area, self.devicePixelRatioF())
+
+    def mousePressEvent(self, event):
+        self.compositor.press(event, self)
+
+    def mouseMoveEvent(self, event):
+        self.compositor.drag_to(event)
+
+    def mouseDoubleClickEvent(self, event):
+        character = self.compositor.character_at(event.globalPos())
+        if character is not None:
+            character.say_hello()
+
+class Compositor(QObject):
+    def __init__(self, count):
+        # 캐릭터와 말풍선을 창 하나씩이 아니라 화면당 오버레이 하나에 직접 그린다
+        super().__init__()
+        from swarm import Swarm
+        self.swarm = Swarm(SEED)
+        self.characters = []
+        self.visible = False
+        self.ticks = 0
+        self.dragging = None
+        self.drag_offset = QPoint()
+        self.dirty = QRegion()
+        self.overlays = []
+        self.bubble_timer = QTimer(self)
+        self.bubble_timer.setSingleShot(True)
+        self.bubble_timer.timeout.connect(self.expire_bubbles)
+        self.move_job = scheduler.add(self.tick)
+        world = world_model.current()
+        self.swarm.set_world(world, CHARACTER_BOX)
+        self.swarm.collide = CHARACTER_SIZE if COLLIDE else 0
+        for _ in range(count):
+            mover = Mover.spawn_in(world, CHARACTER_BOX, rng)
+            index = self.swarm.add(mover.x, mover.y, mover.speed_x, mover.speed_y,
+                                   mover.max_x, mover.max_y, mover.min_x, mover.min_y)
+            self.characters.append(OverlayCharacter(self, index))
+        self.positions = self.swarm.pos.astype(int).tolist()
+        self.create_overlays()
+        world_model.changed.connect(self.update_world)
+        image_registry.ready.connect(self.reload_sprites)
+        image_registry.load(CHARACTER_IMAGE, CHARACTER_SIZE, CHARACTER_FRAMES)
+
+    def create_overlays(self):
+        for overlay in self.overlays:
+            overlay.hide()
+            overlay.deleteLater()
+        self.overlays = [Overlay(self, screen) for screen in QApplication.screens()]
+
+    def update_world(self):
+        # 화면이 추가/제거되면 경계를 다시 잡고 화면마다 오버레이를 새로 만든다
+        self.swarm.set_world(world_model.current(), CHARACTER_BOX)
+        self.positions = self.swarm.pos.astype(int).tolist()
+        self.create_overlays()
+        if self.visible:
+            self.show()
+
+    def reload_sprites(self, path=None):
+        for character in self.characters:
+            character.load_sprites()
+            self.invalidate(character)
+        self.flush()
+
+    def sync(self, character, flush=True):
+        self.swarm.active[character.index] = (self.visible and character.visible and
+                                              character.auto_move_enabled and not character.is_dragging)
+        scheduler.set_active(self.move_job, bool(self.swarm.active.any()))
+        scheduler.set_active(character.speech_job, self.visible and character.visible)
+        self.invalidate(character)
+        if flush:
+            self.flush()
+
+    def tick(self, dt=TICK_SECONDS):
+        moved, _ = self.swarm.step(dt / TICK_SECONDS)
+        self.positions = self.swarm.pos.astype(int).tolist()
+        self.ticks += 1
+        characters = self.characters
+        for i in moved.tolist():
+            self.invalidate(characters[i])
+        self.flush()
+
+    def invalidate(self, character):
+        if character.visible and character.message is not None:
+            rect = character.rect()
+            character.bubble_at = place_bubble(character, rect.x(), rect.y(), rect.width(), rect.height())
+        else:
+            bubble_space.remove(character)
+        bounds = character.bounds()
+        self.dirty += character.drawn_rect
+        self.dirty += bounds
+        character.drawn_rect = bounds
+
+    def flush(self):
+        # 바뀐 영역만 다시 그리고, 빈 곳은 클릭이 통과하도록 마스크를 캐릭터/말풍선 영역으로 맞춘다
+        if self.dirty.isEmpty():
+            return
+        shapes = QRegion()
+        for character in self.characters:
+            shapes += character.drawn_rect
+        for overlay in self.overlays:
+            geometry = overlay.geometry()
+            dirty = self.dirty & geometry
+            if dirty.isEmpty():
+                continue
+            mask = (shapes & geometry).translated(-geometry.topLeft())
+            if mask.isEmpty():
+                # 그릴 것이 없는 화면은 오버레이를 숨겨 모서리 한 점도 클릭을 가로채지 않게 한다
+                overlay.hide()
+                continue
+            overlay.setMask(mask)
+            if self.visible and not overlay.isVisible():
+                overlay.show()
+            overlay.update(dirty.translated(-geometry.topLeft()))
+        self.dirty = QRegion()
+
+    def paint(self, painter, area, ratio):
+        frame = (self.ticks // FRAME_TICKS) % CHARACTER_FRAMES
+        facing = (self.swarm.vel[:, 0] > 0).tolist()
+        for character in self.characters:
+            rect = character.rect()
+            if not character.visible or not area.intersects(rect):
+                continue
+            facing_right = facing[character.index]
+            if character.has_image:
+                right, left = character.sprites
+                pixmap = (right if facing_right else left)[frame]
+                size = pixmap.size() / pixmap.devicePixelRatio()
+                painter.drawPixmap(rect.x() + (rect.width() - size.width()) // 2,
+                                   rect.y() + (rect.height() - size.height()) // 2, pixmap)
+            else:
+                painter.setFont(emoji_font())
+                painter.drawText(rect, Qt.AlignCenter, "🐱" if facing_right else "🐾")
+        for character in self.characters:
+            if character.message is not None and area.intersects(character.bubble_rect()):
+                painter.drawPixmap(character.bubble_rect().topLeft(), render_bubble(character.message, ratio))
+
+    def character_at(self, position):
+        for character in reversed(self.characters):
+            if character.visible and character.rect().contains(position):
+                return character
+        return None
+
+    def press(self, event, overlay):
+        character = self.character_at(event.globalPos())
+        if character is None:
+            event.ignore()
+            return
+        if event.button() == Qt.LeftButton:
+            character.is_dragging = True
+            self.dragging = character
+            self.drag_offset = event.globalPos() - character.rect().topLeft()
+            self.sync(character)
+            QTimer.singleShot(3000, character.end_drag)
+        elif event.button() == Qt.RightButton:
+            show_character_menu(character, event.globalPos(), overlay)
+
+    def drag_to(self, event):
+        character = self.dragging
+        if character is None or not character.is_dragging or event.buttons() != Qt.LeftButton:
+            return
+        i = character.index
+        new_pos = event.globalPos() - self.drag_offset
+        x = max(self.swarm.lo[i, 0], min(self.swarm.hi[i, 0], new_pos.x()))
+        y = max(self.swarm.lo[i, 1], min(self.swarm.hi[i, 1], new_pos.y()))
+        self.swarm.pos[i] = world_model.current().contain(x, y, CHARACTER_BOX)[:2]
+        self.positions[i] = [int(self.swarm.pos[i, 0]), int(self.swarm.pos[i, 1])]
+        self.invalidate(character)
+        self.flush()
+
+    def say(self, character, message):
+        talking = [c for c in self.characters if c.message is not None and c is not character]
+        if len(talking) >= MAX_BUBBLES:
+            oldest = min(talking, key=lambda c: c.expires)
+            oldest.message = None
+            self.invalidate(oldest)
+        character.message = message
+        character.expires = time.monotonic() + BUBBLE_LIFETIME / 1000
+        self.invalidate(character)
+        self.flush()
+        self.arm_bubble_timer()
+
+    def expire_bubbles(self):
+        now = time.monotonic()
+        for character in self.characters:
+            if character.message is not None and character.expires <= now:
+                character.message = None
+                self.invalidate(character)
+        self.flush()
+        self.arm_bubble_timer()
+
+    def arm_bubble_timer(self):
+        pending = [c.expires for c in self.characters if c.message is not None]
+        if pending:
+            self.bubble_timer.start(max(0, math.ceil((min(pending) - time.monotonic()) * 1000)))
+        else:
+            self.bubble_timer.stop()
+
+    def show(self):
+        self.visible = True
+        for overlay in self.overlays:
+            self.dirty += overlay.geometry()
+        for character in self.characters:
+            character.visible = True
+            self.sync(character, flush=False)
+        self.flush()
+
+    def hide(self):
+        self.visible = False
+        for character in self.characters:
+            character.message = None
+            self.sync(character, flush=False)
+        self.flush()
+        for overlay in self.overlays:
+            overlay.hide()
+
+    def isVisible(self):
+        return self.visible
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
-
-    character = DesktopCharacter()
+    app.aboutToQuit.connect(bubble_pool.clear)
+    if METRICS_FILE:
+        scheduler.add(dump_metrics, METRICS_INTERVAL, active=True)
+        app.aboutToQuit.connect(dump_metrics)
+
+    swarm_size = int(os.environ.get("CHA_SWARM", "0"))
+    if os.environ.get("CHA_OVERLAY") == "1":
+        character = Compositor(max(1, swarm_size))
+    elif swarm_size > 0:
+        character = CharacterSwarm(swarm_size)
+    else:
+        character = DesktopCharacter()
     character.show()
+    QTimer.singleShot(0, lambda: mark_startup("first_frame"))
+    image_registry.ready.connect(lambda path: mark_startup("sprites_ready"))
 
     if QSystemTrayIcon.isSystemTrayAvailable():
         tray_icon = QSystemTrayIcon()
-        try:
-            tray_icon.setIcon(QIcon("character.png"))
-        except:
-            tray_icon.setIcon(app.style().standardIcon(app.style().SP_ComputerIcon))
+        tray_icon.setIcon(app.style().standardIcon(app.style().SP_ComputerIcon))
+
+        def update_tray_icon(path):
+            pixmap = sprite_cache.get(CHARACTER_IMAGE, CHARACTER_SIZE, frames=CHARACTER_FRAMES)
+            if not pixmap.isNull():
+                tray_icon.setIcon(QIcon(pixmap))
+
+        image_registry.ready.connect(update_tray_icon)
+        update_tray_icon(CHARACTER_IMAGE)
         tray_icon.setToolTip("데스크탑 캐릭터")
         tray_menu = QMenu()
         show_action = tray_menu.addAction("캐릭터 보이기")
@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+BUCKETS = 24
+
+
+class Histogram:
+    # 마이크로초 단위, 2의 거듭제곱 경계 버킷
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, us):
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+        self.buckets[min(BUCKETS - 1, int(us).bit_length())] += 1
+
+    def percentile(self, fraction):
+        target = self.count * fraction
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min(float(1 << i), self.max)
+        return 0.0
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count,
+            "max_us": self.max,
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+        }
+
+
+class Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.add((time.perf_counter() - self.start) * 1e6)
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.monotonic()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.null_timer = nullcontext()
+        self.dump_error = None
+
+    def enable(self):
+        self.enabled = True
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def observe(self, name, us):
+        self.histogram(name).add(us)
+
+    def timed(self, name):
+        # 꺼져 있으면 아무것도 하지 않는 공용 컨텍스트를 돌려준다
+        if not self.enabled:
+            return self.null_timer
+        return Timer(self.histogram(name))
+
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    def snapshot(self):
+        return {
+            "enabled": self.enabled,
+            "uptime_sec": time.monotonic() - self.started,
+            "counters": dict(self.counters),
+            "gauges": {name: read() for name, read in self.gauges.items()},
+            "histograms": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+        }
+
+    def dump(self, path):
+        # 파일을 쓸 수 없어도 앱은 계속 돌아야 하므로, 같은 오류는 한 번만 알린다
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if str(e) != self.dump_error:
+                self.dump_error = str(e)
+                print(f"metrics dump failed: {e}", file=sys.stderr)
+            return False
+        self.dump_error = None
+        return True
+
+
+METRICS_FILE = os.environ.get("CHA_METRICS_FILE")
+METRICS_INTERVAL = max(1, int(os.environ.get("CHA_METRICS_INTERVAL", "60")))  # 0 이하면 매 틱 작업이 되므로 최소 1초
+
+metrics = Metrics(enabled=os.environ.get("CHA_METRICS") == "1" or bool(METRICS_FILE))
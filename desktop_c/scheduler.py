@@ -0,0 +1,124 @@
+import math
+import time
+import traceback
+from PyQt5.QtCore import QObject, QTimer, Qt
+from instrument import metrics
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TICK_INTERVAL = 50
+BATTERY_TICK_INTERVAL = 100
+POWER_CHECK_SECONDS = 60
+MAX_DT = 0.25
+
+
+class Job:
+    def __init__(self, callback, period):
+        self.callback = callback
+        self.name = callback.__qualname__
+        self.period = period
+        self.active = False
+        self.due = 0.0
+
+
+class Scheduler(QObject):
+    def __init__(self):
+        super().__init__()
+        self.jobs = []
+        self.ticking = False
+        self.last_tick = 0.0
+        self.expected = 0.0
+        self.tick_interval = TICK_INTERVAL
+        self.power_due = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+
+    def add(self, callback, period=0, active=False):
+        # period가 0이면 매 틱마다 callback(dt), 아니면 period초마다 callback()
+        job = Job(callback, period)
+        self.jobs.append(job)
+        self.set_active(job, active)
+        return job
+
+    def remove(self, job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+            job.active = False
+
+    def set_active(self, job, active):
+        # 틱이 도는 중이면 다음 틱에서 정리되므로, 잠들어 있을 때만 타이머를 다시 잡는다
+        if job.active == active:
+            return
+        job.active = active
+        if active and job.period:
+            job.due = time.monotonic() + job.period
+        if not self.ticking:
+            self.schedule()
+
+    def schedule(self):
+        # 모든 주기 작업을 하나의 타이머로 합친다. 매 틱 작업이 없으면 다음 주기 작업까지 잠든다
+        now = time.monotonic()
+        active = [job for job in self.jobs if job.active]
+        if not active:
+            self.ticking = False
+            self.timer.stop()
+            return
+        ticking = any(not job.period for job in active)
+        if ticking and not self.ticking:
+            self.last_tick = now
+        self.ticking = ticking
+        if ticking:
+            if now >= self.power_due:
+                self.check_power(now)
+            delay = self.tick_interval / 1000
+        else:
+            delay = max(0.0, min(job.due for job in active) - now)
+        interval = math.ceil(delay * 1000)
+        self.expected = now + interval / 1000
+        self.timer.start(interval)
+
+    def tick(self):
+        now = time.monotonic()
+        dt = min(now - self.last_tick, MAX_DT)
+        self.last_tick = now
+        timed = metrics.enabled
+        if timed:
+            metrics.observe("scheduler.lateness", max(0.0, now - self.expected) * 1e6)
+            tick_start = time.perf_counter()
+        for job in [job for job in self.jobs if job.active]:
+            if not job.active:
+                continue
+            if job.period:
+                if now < job.due:
+                    continue
+                job.due = now + job.period
+            if timed:
+                start = time.perf_counter()
+            try:
+                if job.period:
+                    job.callback()
+                else:
+                    job.callback(dt)
+            except Exception:
+                # 작업 하나가 실패해도 타이머는 다시 걸어야 나머지 이동/말하기가 멈추지 않는다
+                metrics.count("scheduler.errors")
+                traceback.print_exc()
+            if timed:
+                metrics.observe(job.name, (time.perf_counter() - start) * 1e6)
+        if timed:
+            metrics.observe("scheduler.tick", (time.perf_counter() - tick_start) * 1e6)
+        self.schedule()
+
+    def check_power(self, now):
+        self.power_due = now + POWER_CHECK_SECONDS
+        battery = psutil.sensors_battery() if psutil is not None else None
+        on_battery = battery is not None and not battery.power_plugged
+        self.tick_interval = BATTERY_TICK_INTERVAL if on_battery else TICK_INTERVAL
+
+
+scheduler = Scheduler()
@@ -0,0 +1,112 @@
+import random
+from world import World, overlapping_pairs, bounce_apart
+
+START_SPEEDS = [-3, -2, -1, 1, 2, 3]
+SPEEDS = [-4, -3, -2, -1, 1, 2, 3, 4]
+CHANGE_CHANCE = 0.03
+
+
+class Mover:
+    # Qt 없이 캐릭터 한 마리의 이동/방향 상태를 다룬다. 속도 단위는 50ms 틱당 픽셀
+    def __init__(self, x, y, speed_x, speed_y, max_x, max_y, rng, min_x=0, min_y=0):
+        self.x = x
+        self.y = y
+        self.speed_x = speed_x
+        self.speed_y = speed_y
+        self.min_x = min_x
+        self.min_y = min_y
+        self.max_x = max_x
+        self.max_y = max_y
+        self.rng = rng
+        self.facing_right = True
+        self.world = None
+        self.box = 0
+
+    @classmethod
+    def spawn_in(cls, world, box, rng):
+        x, y = world.random_position(box, rng)
+        mover = cls(x, y, rng.choice(START_SPEEDS), rng.choice(START_SPEEDS), 0, 0, rng)
+        mover.set_world(world, box)
+        return mover
+
+    def set_world(self, world, box):
+        self.world = world
+        self.box = box
+        self.min_x, self.min_y, self.max_x, self.max_y = world.limits(box)
+        self.place(self.x, self.y)
+
+    def step(self, steps=1.0):
+        x = self.x + self.speed_x * steps
+        y = self.y + self.speed_y * steps
+        if x <= self.min_x or x >= self.max_x:
+            self.speed_x = -self.speed_x
+            x = max(self.min_x, min(self.max_x, x))
+        if y <= self.min_y or y >= self.max_y:
+            self.speed_y = -self.speed_y
+            y = max(self.min_y, min(self.max_y, y))
+        if self.world is not None:
+            x, y, flip_x, flip_y = self.world.contain(x, y, self.box)
+            if flip_x:
+                self.speed_x = -self.speed_x
+            if flip_y:
+                self.speed_y = -self.speed_y
+        if self.rng.random() < 1 - (1 - CHANGE_CHANCE) ** steps:
+            self.steer()
+        self.x = x
+        self.y = y
+
+    def steer(self):
+        self.speed_x = self.rng.choice(SPEEDS)
+        self.speed_y = self.rng.choice(SPEEDS)
+
+    def turn(self):
+        facing_right = self.speed_x > 0
+        if facing_right == self.facing_right:
+            return False
+        self.facing_right = facing_right
+        return True
+
+    def place(self, x, y):
+        x = max(self.min_x, min(self.max_x, x))
+        y = max(self.min_y, min(self.max_y, y))
+        if self.world is not None:
+            x, y, _, _ = self.world.contain(x, y, self.box)
+        self.x = x
+        self.y = y
+
+
+DEFAULT_SCREENS = [(0, 0, 1920, 1080)]
+
+
+class Simulation:
+    # screens는 (x, y, w, h) 목록. 기본값은 1080p 화면 하나
+    def __init__(self, count, screens=DEFAULT_SCREENS, box=150, seed=None, collide=0):
+        self.rng = random.Random(seed)
+        self.world = World(screens)
+        self.movers = [Mover.spawn_in(self.world, box, self.rng) for _ in range(count)]
+        self.collide = collide
+        self.ticks = 0
+
+    def step(self, steps=1.0):
+        for mover in self.movers:
+            mover.step(steps)
+        if self.collide:
+            self.separate()
+        for mover in self.movers:
+            mover.turn()
+        self.ticks += 1
+
+    def separate(self):
+        # collide는 충돌 상자 한 변의 길이. 공간 해시로 가까운 쌍만 검사한다
+        points = [(mover.x, mover.y) for mover in self.movers]
+        velocities = [[mover.speed_x, mover.speed_y] for mover in self.movers]
+        for a, b in overlapping_pairs(points, self.collide):
+            for i in bounce_apart(a, b, points, velocities):
+                self.movers[i].speed_x, self.movers[i].speed_y = velocities[i]
+
+    def run(self, ticks, steps=1.0):
+        for _ in range(ticks):
+            self.step(steps)
+
+    def state(self):
+        return [(mover.x, mover.y, mover.speed_x, mover.speed_y) for mover in self.movers]
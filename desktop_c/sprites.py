@@ -0,0 +1,51 @@
+import os
+from collections import OrderedDict
+from PyQt5.QtGui import QPixmap, QTransform
+from assets import image_registry
+
+
+class SpriteCache:
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.entries = OrderedDict()
+
+    def get(self, path, size, mirrored=False, frame=0, frames=1):
+        # (이미지, 크기, 방향, 프레임) 조합마다 한 번만 만들고 모든 캐릭터가 같이 쓴다.
+        # 축소된 시트는 image_registry가 로딩을 끝냈을 때만 있고, 그 전에는 빈 픽스맵을 돌려준다
+        key = (path, size, mirrored, frame, frames)
+        pixmap = self.entries.get(key)
+        if pixmap is not None:
+            self.entries.move_to_end(key)
+            return pixmap
+        if mirrored:
+            pixmap = self.get(path, size, False, frame, frames).transformed(QTransform().scale(-1, 1))
+        else:
+            sheet = image_registry.image(path, size, frames)
+            if sheet is None or sheet.isNull():
+                return QPixmap()
+            frame_width = sheet.width() // frames
+            pixmap = QPixmap.fromImage(sheet.copy(frame * frame_width, 0, frame_width, sheet.height()))
+        if pixmap.isNull():
+            return pixmap
+        self.entries[key] = pixmap
+        self.used_bytes += self.cost(pixmap)
+        self.evict()
+        return pixmap
+
+    def frames(self, path, size, frames=1):
+        right = [self.get(path, size, False, i, frames) for i in range(frames)]
+        left = [self.get(path, size, True, i, frames) for i in range(frames)]
+        return right, left
+
+    def evict(self):
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            _, pixmap = self.entries.popitem(last=False)
+            self.used_bytes -= self.cost(pixmap)
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+sprite_cache = SpriteCache(int(os.environ.get("CHA_SPRITE_BUDGET_MB", "32")) * 1024 * 1024)
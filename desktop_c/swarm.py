@@ -0,0 +1,128 @@
+import numpy as np
+from sim import SPEEDS, CHANGE_CHANCE
+
+SPEED_CHOICES = np.array(SPEEDS, dtype=float)
+NEIGHBOR_CELLS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def grid_pairs(points, size):
+    # world.overlapping_pairs와 같은 격자(자기 칸 + 반쪽 이웃 칸)를 numpy로 돈다. (a, b) 배열, a < b
+    count = len(points)
+    if count < 2:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    cells = np.floor(points / size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    width = int(cells[:, 1].max()) + 3
+    keys = cells[:, 0] * width + cells[:, 1] + 1
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    found_a = []
+    found_b = []
+    for dx, dy in NEIGHBOR_CELLS:
+        target = keys + dx * width + dy
+        start = np.searchsorted(sorted_keys, target, "left")
+        counts = np.searchsorted(sorted_keys, target, "right") - start
+        total = int(counts.sum())
+        if not total:
+            continue
+        a = np.repeat(np.arange(count), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        b = order[np.repeat(start, counts) + offsets]
+        keep = (np.abs(points[a] - points[b]) < size).all(axis=1)
+        if (dx, dy) == (0, 0):
+            keep &= b > a
+        found_a.append(a[keep])
+        found_b.append(b[keep])
+    if not found_a:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    a = np.concatenate(found_a)
+    b = np.concatenate(found_b)
+    return np.minimum(a, b), np.maximum(a, b)
+
+
+class Swarm:
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.pos = np.zeros((0, 2))
+        self.vel = np.zeros((0, 2))
+        self.lo = np.zeros((0, 2))
+        self.hi = np.zeros((0, 2))
+        self.active = np.zeros(0, dtype=bool)
+        self.world = None
+        self.screens = np.zeros((0, 4))
+        self.box = 0
+        self.collide = 0
+
+    def __len__(self):
+        return len(self.pos)
+
+    def add(self, x, y, speed_x, speed_y, max_x, max_y, min_x=0, min_y=0):
+        self.pos = np.vstack([self.pos, [x, y]])
+        self.vel = np.vstack([self.vel, [speed_x, speed_y]])
+        self.lo = np.vstack([self.lo, [min_x, min_y]])
+        self.hi = np.vstack([self.hi, [max_x, max_y]])
+        self.active = np.append(self.active, True)
+        return len(self.pos) - 1
+
+    def set_world(self, world, box):
+        min_x, min_y, max_x, max_y = world.limits(box)
+        self.world = world
+        self.box = box
+        self.screens = np.array(world.screens, dtype=float)
+        self.lo[:] = (min_x, min_y)
+        self.hi[:] = (max_x, max_y)
+        np.clip(self.pos, self.lo, self.hi, out=self.pos)
+        for i in range(len(self.pos)):
+            self.pos[i] = world.contain(self.pos[i, 0], self.pos[i, 1], box)[:2]
+
+    def contain(self, new_pos, hit):
+        # 화면이 여러 개일 때 중심이 어느 화면에도 없는(화면 사이 빈 곳) 캐릭터만 파이썬으로 처리한다
+        centers = new_pos + self.box / 2
+        sx, sy, sw, sh = self.screens.T
+        cx = centers[:, :1]
+        cy = centers[:, 1:]
+        inside = ((cx >= sx) & (cx < sx + sw) & (cy >= sy) & (cy < sy + sh)).any(axis=1)
+        for i in np.flatnonzero(~inside & self.active).tolist():
+            x, y, flip_x, flip_y = self.world.contain(new_pos[i, 0], new_pos[i, 1], self.box)
+            new_pos[i] = (x, y)
+            flips = np.array([flip_x, flip_y])
+            self.vel[i, flips] = -self.vel[i, flips]
+            hit[i] |= flips
+
+    def separate(self, new_pos, hit):
+        # 숨겨졌거나 멈춘(드래그 중 포함) 캐릭터는 벽이 되지 않도록 움직이는 캐릭터끼리만 검사한다.
+        # 튕기는 규칙은 world.bounce_apart와 같고, 모든 쌍에 한 번에 적용한다
+        indices = np.flatnonzero(self.active)
+        points = new_pos[indices]
+        a, b = grid_pairs(points, self.collide)
+        if not len(a):
+            return
+        distance = np.abs(points[a] - points[b])
+        axis = (distance[:, 0] < distance[:, 1]).astype(int)
+        a_first = points[a, axis] <= points[b, axis]
+        first = np.where(a_first, a, b)
+        second = np.where(a_first, b, a)
+        old_vel = self.vel[indices]
+        vel = old_vel.copy()
+        vel[first, axis] = -np.abs(old_vel[first, axis])
+        vel[second, axis] = np.abs(old_vel[second, axis])
+        changed = (vel != old_vel).any(axis=1)
+        self.vel[indices] = vel
+        hit[indices[changed]] = True
+
+    def step(self, steps=1.0):
+        # steps는 경과 시간을 50ms 틱 단위로 나타낸 값. 한 번의 벡터 연산으로 모든 캐릭터를 이동시키고, 움직인 인덱스와 속도가 바뀐 인덱스를 돌려준다
+        active = self.active
+        new_pos = self.pos + self.vel * steps
+        hit = ((new_pos <= self.lo) | (new_pos >= self.hi)) & active[:, None]
+        self.vel[hit] = -self.vel[hit]
+        np.clip(new_pos, self.lo, self.hi, out=new_pos)
+        if len(self.screens) > 1:
+            self.contain(new_pos, hit)
+        if self.collide:
+            self.separate(new_pos, hit)
+        change = (self.rng.random(len(active)) < 1 - (1 - CHANGE_CHANCE) ** steps) & active
+        if change.any():
+            self.vel[change] = self.rng.choice(SPEED_CHOICES, size=(int(change.sum()), 2))
+        self.pos[active] = new_pos[active]
+        return np.flatnonzero(active), np.flatnonzero(hit.any(axis=1) | change)
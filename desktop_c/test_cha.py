@@ -0,0 +1,60 @@
+import importlib.util
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QT_LOGGING_RULES", "default.warning=false")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEvent
+
+app = QApplication.instance() or QApplication([])
+
+import cha
+from scheduler import scheduler
+
+# 오프스크린 Qt로 창/작업 수명만 검사한다: python -m unittest test_cha
+
+
+class CharacterLifetimeTest(unittest.TestCase):
+    def test_closed_character_moves_and_talks_again_when_shown(self):
+        character = cha.DesktopCharacter()
+        character.show()
+        character.close()
+        self.assertFalse(character.move_job.active)
+        self.assertFalse(character.speech_job.active)
+        character.show()
+        self.assertIn(character.move_job, scheduler.jobs)
+        self.assertIn(character.speech_job, scheduler.jobs)
+        self.assertTrue(character.move_job.active)
+        self.assertTrue(character.speech_job.active)
+        start = character.pos()
+        for _ in range(20):
+            scheduler.last_tick -= cha.TICK_SECONDS
+            scheduler.tick()
+        self.assertNotEqual(character.pos(), start)
+        jobs = [character.move_job, character.speech_job]
+        character.close()
+        character.deleteLater()
+        QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        for job in jobs:
+            self.assertNotIn(job, scheduler.jobs)
+
+
+@unittest.skipIf(importlib.util.find_spec("numpy") is None, "numpy 없음")
+class OverlayLifetimeTest(unittest.TestCase):
+    def test_closed_overlay_character_comes_back_on_show(self):
+        compositor = cha.Compositor(2)
+        compositor.show()
+        character = compositor.characters[0]
+        character.close()
+        self.assertFalse(character.speech_job.active)
+        compositor.show()
+        self.assertTrue(character.visible)
+        self.assertIn(character.speech_job, scheduler.jobs)
+        self.assertTrue(character.speech_job.active)
+        compositor.hide()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import random
+import unittest
+from sim import Mover, Simulation
+from world import World, overlapping_pairs, naive_pairs, bounce_apart
+
+try:
+    import numpy as np
+    from swarm import Swarm, grid_pairs
+except ImportError:
+    np = None
+
+# 디스플레이 없이 이동 로직만 검사한다: python -m unittest test_sim
+
+TWO_SCREENS = [(0, 0, 1920, 1080), (1920, 200, 1280, 1024)]
+
+
+class SimulationTest(unittest.TestCase):
+    def test_same_seed_replays_same_state(self):
+        for collide in (0, 120):
+            first = Simulation(50, TWO_SCREENS, seed=1, collide=collide)
+            second = Simulation(50, TWO_SCREENS, seed=1, collide=collide)
+            first.run(500)
+            second.run(500)
+            self.assertEqual(first.state(), second.state())
+
+    def test_time_based_steps_cover_same_distance(self):
+        # 50ms 틱 두 번과 100ms 틱 한 번은 같은 거리를 가야 한다
+        world = World([(0, 0, 1920, 1080)])
+        fine = Mover(500, 500, 3, -2, 0, 0, random.Random(0))
+        coarse = Mover(500, 500, 3, -2, 0, 0, random.Random(0))
+        fine.set_world(world, 150)
+        coarse.set_world(world, 150)
+        fine.rng.random = coarse.rng.random = lambda: 1.0
+        fine.step()
+        fine.step()
+        coarse.step(2.0)
+        self.assertEqual((fine.x, fine.y), (coarse.x, coarse.y))
+
+    def test_movers_stay_on_screens(self):
+        simulation = Simulation(30, TWO_SCREENS, seed=2)
+        simulation.run(2000)
+        for mover in simulation.movers:
+            self.assertIsNotNone(simulation.world.screen_at(mover.x + 75, mover.y + 75))
+
+
+class CollisionTest(unittest.TestCase):
+    def test_grid_pairs_match_naive_pairs(self):
+        rng = random.Random(3)
+        for count in (0, 1, 10, 200):
+            points = [(rng.uniform(0, 1920), rng.uniform(0, 1080)) for _ in range(count)]
+            self.assertEqual(sorted(overlapping_pairs(points, 120)), sorted(naive_pairs(points, 120)))
+
+    def test_bounce_apart_turns_approaching_pair(self):
+        points = [(100, 100), (180, 110)]
+        velocities = [[3, 0], [-2, 0]]
+        changed = bounce_apart(0, 1, points, velocities)
+        self.assertEqual(sorted(changed), [0, 1])
+        self.assertEqual(velocities, [[-3, 0], [2, 0]])
+
+    def test_bounce_apart_leaves_separating_pair(self):
+        points = [(100, 100), (180, 110)]
+        velocities = [[-3, 0], [2, 0]]
+        self.assertEqual(bounce_apart(0, 1, points, velocities), [])
+
+
+class NoSteer:
+    # 무작위 방향 전환 없이 이동/충돌 결과만 보려고 쓰는 가짜 난수 생성기 (random.Random, numpy 둘 다 흉내)
+    def random(self, size=None):
+        return 1.0 if size is None else np.ones(size)
+
+
+@unittest.skipIf(np is None, "numpy 없음")
+class SwarmTest(unittest.TestCase):
+    def make_swarm(self):
+        swarm = Swarm(seed=0)
+        swarm.set_world(World([(0, 0, 1920, 1080)]), 150)
+        swarm.collide = 120
+        swarm.rng = NoSteer()
+        return swarm
+
+    def test_swarm_step_matches_mover_step(self):
+        # 방향 전환을 끄면 Swarm.step과 Mover.step은 여러 화면에서도 같은 위치/속도를 내야 한다
+        simulation = Simulation(40, TWO_SCREENS, seed=5)
+        swarm = Swarm()
+        swarm.rng = NoSteer()
+        for mover in simulation.movers:
+            mover.rng = NoSteer()
+            swarm.add(mover.x, mover.y, mover.speed_x, mover.speed_y,
+                      mover.max_x, mover.max_y, mover.min_x, mover.min_y)
+        swarm.set_world(simulation.world, 150)
+        for steps in [1.0] * 500 + [1.7] * 500:
+            simulation.step(steps)
+            swarm.step(steps)
+        self.assertEqual(swarm.pos.tolist(), [[mover.x, mover.y] for mover in simulation.movers])
+        self.assertEqual(swarm.vel.tolist(), [[mover.speed_x, mover.speed_y] for mover in simulation.movers])
+
+    def test_numpy_grid_matches_naive_pairs(self):
+        rng = random.Random(4)
+        for count in (0, 1, 10, 300):
+            points = [(rng.uniform(-500, 1920), rng.uniform(0, 1080)) for _ in range(count)]
+            a, b = grid_pairs(np.array(points, dtype=float).reshape(-1, 2), 120)
+            self.assertEqual(sorted(zip(a.tolist(), b.tolist())), sorted(naive_pairs(points, 120)))
+
+    def test_inactive_character_is_not_a_wall(self):
+        swarm = self.make_swarm()
+        swarm.add(500, 500, 0, 0, 1770, 930)
+        swarm.add(400, 500, 3, 0, 1770, 930)
+        swarm.active[0] = False
+        swarm.step()
+        self.assertEqual(swarm.vel[1].tolist(), [3, 0])
+
+    def test_active_characters_bounce_apart(self):
+        swarm = self.make_swarm()
+        swarm.add(500, 500, -2, 0, 1770, 930)
+        swarm.add(400, 500, 3, 0, 1770, 930)
+        swarm.step()
+        self.assertEqual(swarm.vel.tolist(), [[2, 0], [-3, 0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
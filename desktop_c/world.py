@@ -0,0 +1,139 @@
+from collections import defaultdict
+
+
+def intersects(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+class SpatialHash:
+    # 균일 격자 해시. 사각형이 걸치는 칸마다 키를 넣어 두고, 질의는 주변 칸만 본다
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.rects = {}
+
+    def cells_for(self, x, y, w, h):
+        size = self.cell_size
+        for cx in range(int(x // size), int((x + w - 1) // size) + 1):
+            for cy in range(int(y // size), int((y + h - 1) // size) + 1):
+                yield cx, cy
+
+    def insert(self, key, x, y, w, h):
+        self.remove(key)
+        self.rects[key] = (x, y, w, h)
+        for cell in self.cells_for(x, y, w, h):
+            self.cells[cell].add(key)
+
+    def remove(self, key):
+        rect = self.rects.pop(key, None)
+        if rect is None:
+            return
+        for cell in self.cells_for(*rect):
+            keys = self.cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+    def query(self, x, y, w, h):
+        found = set()
+        rect = (x, y, w, h)
+        for cell in self.cells_for(x, y, w, h):
+            for key in self.cells.get(cell, ()):
+                if key not in found and intersects(rect, self.rects[key]):
+                    found.add(key)
+        return found
+
+
+def overlapping_pairs(points, size):
+    # 같은 크기(size) 상자들의 좌상단 좌표 목록에서 겹치는 쌍을 찾는다. 평균 O(N)
+    grid = defaultdict(list)
+    for i, (x, y) in enumerate(points):
+        grid[int(x // size), int(y // size)].append(i)
+    pairs = []
+    for (cx, cy), members in grid.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = members if (dx, dy) == (0, 0) else grid.get((cx + dx, cy + dy))
+            if not others:
+                continue
+            for a in members:
+                ax, ay = points[a]
+                for b in others:
+                    if (dx, dy) == (0, 0) and b <= a:
+                        continue
+                    bx, by = points[b]
+                    if abs(ax - bx) < size and abs(ay - by) < size:
+                        pairs.append((a, b) if a < b else (b, a))
+    return pairs
+
+
+def naive_pairs(points, size):
+    pairs = []
+    for a in range(len(points)):
+        ax, ay = points[a]
+        for b in range(a + 1, len(points)):
+            bx, by = points[b]
+            if abs(ax - bx) < size and abs(ay - by) < size:
+                pairs.append((a, b))
+    return pairs
+
+
+def bounce_apart(a, b, points, velocities):
+    # 덜 겹친 축으로 서로 반대 방향을 향하게 한다. 바뀐 인덱스를 돌려준다
+    ax, ay = points[a]
+    bx, by = points[b]
+    axis = 0 if abs(ax - bx) >= abs(ay - by) else 1
+    first, second = (a, b) if points[a][axis] <= points[b][axis] else (b, a)
+    changed = []
+    if velocities[first][axis] > 0:
+        velocities[first][axis] = -velocities[first][axis]
+        changed.append(first)
+    if velocities[second][axis] < 0:
+        velocities[second][axis] = -velocities[second][axis]
+        changed.append(second)
+    return changed
+
+
+class World:
+    # 모든 화면의 사용 가능 영역(작업 표시줄 제외)을 (x, y, w, h) 목록으로 들고 있는다
+    def __init__(self, screens):
+        self.screens = list(screens)
+        self.left = min(x for x, y, w, h in self.screens)
+        self.top = min(y for x, y, w, h in self.screens)
+        self.right = max(x + w for x, y, w, h in self.screens)
+        self.bottom = max(y + h for x, y, w, h in self.screens)
+
+    def limits(self, box):
+        return self.left, self.top, self.right - box, self.bottom - box
+
+    def screen_at(self, x, y):
+        for screen in self.screens:
+            sx, sy, sw, sh = screen
+            if sx <= x < sx + sw and sy <= y < sy + sh:
+                return screen
+        return None
+
+    def nearest_screen(self, x, y):
+        def distance(screen):
+            sx, sy, sw, sh = screen
+            dx = max(sx - x, 0, x - (sx + sw - 1))
+            dy = max(sy - y, 0, y - (sy + sh - 1))
+            return dx * dx + dy * dy
+        return min(self.screens, key=distance)
+
+    def contain(self, x, y, box):
+        # 상자 중심이 어느 화면에든 있으면 그대로 두고(모니터 사이를 건널 수 있다),
+        # 화면 사이 빈 곳에 빠지면 가장 가까운 화면 안으로 밀어 넣고 튕길 축을 알려 준다
+        center_x = x + box / 2
+        center_y = y + box / 2
+        if self.screen_at(center_x, center_y) is not None:
+            return x, y, False, False
+        sx, sy, sw, sh = self.nearest_screen(center_x, center_y)
+        new_x = max(sx, min(sx + sw - box, x))
+        new_y = max(sy, min(sy + sh - box, y))
+        return new_x, new_y, new_x != x, new_y != y
+
+    def random_position(self, box, rng):
+        sx, sy, sw, sh = rng.choice(self.screens)
+        return rng.randint(sx, max(sx, sx + sw - box)), rng.randint(sy, max(sy, sy + sh - box))